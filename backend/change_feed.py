@@ -0,0 +1,155 @@
+# change_feed.py – evenimente de modificare trimise clienților conectați (SSE)
+#
+# Fiecare client are o coadă asyncio mică; publish() poate fi apelat din
+# thread-urile endpoint-urilor sincrone. Cu mai mulți workeri, evenimentele
+# trec prin Postgres (NOTIFY / LISTEN), ca să ajungă la toți workerii.
+import asyncio
+import itertools
+import json
+import os
+import select
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+
+class ChangeFeed:
+    """
+    Fan-out în memorie al evenimentelor de modificare, pe agenție.
+
+    Endpoint-urile de scriere sunt sincrone (rulează în threadpool), așa că
+    publish() doar programează livrarea pe event loop-ul asyncio; fiecare
+    client conectat are o coadă mică, iar un client inactiv costă doar o
+    corutină suspendată în queue.get().
+
+    Cu mai mulți workeri, evenimentele trec prin Postgres (NOTIFY / LISTEN),
+    ca să ajungă și la clienții conectați la ceilalți workeri.
+    """
+
+    QUEUE_SIZE = 100
+    CHANNEL = "furnizori_changes"
+
+    def __init__(self, database_url: Optional[str] = None) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[Optional[int], set] = {}
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._remote_listeners: list = []
+        self._database_url = database_url
+        self._notify_engine = None
+        if database_url:
+            # conexiune dedicată pentru NOTIFY, în afara pool-ului aplicației –
+            # sesiunea cererii își ține încă conexiunea când se publică evenimentul
+            self._notify_engine = create_engine(database_url, pool_pre_ping=True,
+                                                pool_size=1, max_overflow=0)
+
+    @property
+    def _origin(self) -> str:
+        # calculat la fiecare apel – rămâne corect și după un fork (gunicorn --preload)
+        return str(os.getpid())
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Idempotent – se apelează la startup și la fiecare stream nou
+        (Electron pornește uvicorn cu --lifespan off, deci fără startup)."""
+        with self._lock:
+            if self._loop is loop:
+                return
+            self._loop = loop
+        if self._database_url:
+            listen_engine = create_engine(self._database_url, poolclass=NullPool)
+            threading.Thread(target=self._listen, args=(listen_engine,),
+                             name="change-feed-listener", daemon=True).start()
+
+    def next_id(self) -> str:
+        """Id SSE unic și între workeri (pid + contor local)."""
+        with self._lock:
+            return f"{self._origin}-{next(self._seq)}"
+
+    def on_remote(self, fn) -> None:
+        """fn(event) rulează (pe thread-ul listener) pentru evenimentele altor workeri."""
+        self._remote_listeners.append(fn)
+
+    def subscribe(self, agency_id: Optional[int]) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers.setdefault(agency_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, agency_id: Optional[int], q: asyncio.Queue) -> None:
+        subs = self._subscribers.get(agency_id)
+        if subs is None:
+            return
+        subs.discard(q)
+        if not subs:
+            del self._subscribers[agency_id]
+
+    def publish(self, type: str, agency_id: Optional[int] = None, **data: Any) -> None:
+        """Thread-safe; se apelează după db.commit()."""
+        event = {"id": self.next_id(), "origin": self._origin,
+                 "type": type, "agency_id": agency_id, **data}
+        if self._notify_engine is not None:
+            # se întoarce prin LISTEN la toți workerii, inclusiv la acesta; scrierea
+            # e deja salvată, deci o eroare aici nu trebuie să devină un 500
+            try:
+                with self._notify_engine.begin() as conn:
+                    conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                 {"channel": self.CHANNEL, "payload": json.dumps(event)})
+            except Exception as e:
+                print(f"Change feed publish error ({type}): {e}")
+            return
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _listen(self, listen_engine) -> None:
+        connected_before = False
+        while True:
+            try:
+                raw = listen_engine.raw_connection()
+                try:
+                    conn = raw.dbapi_connection
+                    conn.autocommit = True
+                    conn.cursor().execute(f"LISTEN {self.CHANNEL}")
+                    if connected_before:
+                        # am pierdut evenimente cât am fost deconectați
+                        self._receive({"id": self.next_id(), "origin": None, "type": "resync", "agency_id": None})
+                    connected_before = True
+                    while True:
+                        if select.select([conn], [], [], 30) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self._receive(json.loads(conn.notifies.pop(0).payload))
+                finally:
+                    raw.close()
+            except Exception as e:
+                print(f"Change feed listener error: {e}")
+                time.sleep(3)
+
+    def _receive(self, event: dict) -> None:
+        if event["origin"] != self._origin:
+            for fn in self._remote_listeners:
+                try:
+                    fn(event)
+                except Exception as e:
+                    print(f"Change feed remote listener error: {e}")
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict) -> None:
+        agency_id = event["agency_id"]
+        if agency_id is None:
+            # evenimentele globale (agenții, categorii) ajung la toți clienții
+            targets = [q for subs in self._subscribers.values() for q in subs]
+        else:
+            targets = list(self._subscribers.get(agency_id, ()))
+        for q in targets:
+            try:
+                q.put_nowait(event)
+            except asyncio.QueueFull:
+                # clientul nu ține pasul – îi cerem să reîncarce tot
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait({"id": event["id"], "type": "resync", "agency_id": agency_id})
@@ -0,0 +1,380 @@
+# dedup.py – detectare furnizori duplicați (nume / email / telefon scrise liber)
+#
+# Normalizăm câmpurile, construim un index de blocare (domeniu email, cifrele
+# telefonului, trigrame din nume) și scorăm doar perechile care împart cel puțin
+# o cheie – un furnizor nou nu se compară cu toate rândurile agenției.
+#
+# Numele se compară pe trigrame (în interiorul fiecărui cuvânt), de două ori:
+# o dată pe toate cuvintele și o dată doar pe cele distinctive – fără cuvintele
+# generice („construct”, „invest”, „instalatii”) și fără cele prezente la foarte
+# mulți furnizori ai agenției. Scorul e minimul celor două: „Nord Construct
+# Invest” / „Sud Construct Invest” diferă în partea distinctivă, „Popescu
+# Beton” / „Popescu Auto” diferă în rest. Un nume făcut doar din cuvinte
+# generice se potrivește numai exact (sau prin email / telefon).
+#
+# Pentru nume folosim „prefix filtering”: dacă Jaccard(a, b) >= t, atunci b
+# conține cel puțin una din cele |a| - ceil(t*|a|) + 1 trigrame ale lui a, deci
+# e suficient să căutăm după trigramele distinctive cele mai rare ale lui a.
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# forme juridice / cuvinte care nu disting între furnizori
+STOP_TOKENS = {
+    "sc", "srl", "sa", "snc", "scs", "sca", "pfa", "ii", "if", "srld", "ra",
+    "ltd", "llc", "gmbh", "ag", "inc", "co", "company", "corp", "group",
+    "romania", "ro",
+}
+
+# cuvinte care descriu domeniul, nu firma – contează la potrivirea exactă a
+# numelui, dar nu și în scorul pe trigrame
+GENERIC_TOKENS = {
+    "construct", "constructii", "constructie", "constructor", "invest", "investitii",
+    "instal", "instalatii", "impex", "import", "export", "trans", "transport",
+    "com", "comert", "comimpex", "prod", "productie", "serv", "service", "servicii",
+    "grup", "consult", "consulting", "design", "tehnic", "tehnica", "proiect",
+    "proiectare", "industrial", "industries", "distributie", "distribution",
+    "trading", "holding", "business", "solutions", "systems", "international",
+    "partners", "management", "expert", "global", "general", "total", "tech",
+    "development", "dezvoltare", "edil", "materiale", "activ",
+}
+# plus cuvintele prezente la peste max(GENERIC_MIN_DF, GENERIC_DF_RATIO * n) furnizori
+GENERIC_MIN_DF = 20
+GENERIC_DF_RATIO = 0.002
+
+# la adresele publice domeniul nu spune nimic – folosim adresa întreagă
+FREE_EMAIL_DOMAINS = {
+    "gmail.com", "yahoo.com", "yahoo.ro", "hotmail.com", "outlook.com",
+    "live.com", "icloud.com", "mail.com", "protonmail.com",
+}
+
+DEFAULT_THRESHOLD = 0.7
+# sub acest prag se potrivesc deja nume diferite cu un cuvânt comun
+MIN_THRESHOLD = 0.6
+# un email / telefon comun la mai mulți furnizori e un placeholder („0000…”,
+# adresa unui distribuitor) – nu mai blochează și nu mai crește scorul
+MAX_CONTACT_BLOCK = 50
+# un grup din raport nu crește peste atât prin potriviri aproximative
+MAX_CLUSTER = 50
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+class SupplierRecord(NamedTuple):
+    id: int
+    name: str
+    office_email: Optional[str] = None
+    office_phone: Optional[str] = None
+
+
+class _Fingerprint(NamedTuple):
+    name: str
+    grams: frozenset       # doar din cuvintele distinctive
+    all_grams: frozenset
+    email_key: Optional[str]
+    phone_key: Optional[str]
+
+
+def normalize_name(name: str) -> str:
+    """„S.C. Construcții Bună S.R.L.” -> „constructii buna”."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace(".", "")
+    tokens = [t for t in _NON_ALNUM.split(text) if t and t not in STOP_TOKENS]
+    return " ".join(tokens)
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Ultimele 9 cifre – ignoră prefixul +40 / 0040 / 0 și separatorii."""
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) < 6 or len(set(digits)) == 1:
+        return None
+    return digits[-9:]
+
+
+def email_key(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    domain = email.rsplit("@", 1)[1]
+    return email if domain in FREE_EMAIL_DOMAINS else domain
+
+
+def name_grams(norm_name: str, generic: FrozenSet[str] = frozenset()) -> frozenset:
+    """Trigramele fiecărui cuvânt care nu e în `generic` (cuvintele scurte – întregi)."""
+    grams: Set[str] = set()
+    for token in norm_name.split():
+        if token in generic:
+            continue
+        if len(token) < 3:
+            grams.add(token)
+        else:
+            grams.update(token[i:i + 3] for i in range(len(token) - 2))
+    return frozenset(grams)
+
+
+def fingerprint(rec: SupplierRecord, generic: FrozenSet[str] = frozenset()) -> _Fingerprint:
+    norm = normalize_name(rec.name)
+    return _Fingerprint(norm, name_grams(norm, generic), name_grams(norm),
+                        email_key(rec.office_email), normalize_phone(rec.office_phone))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def name_similarity(a: _Fingerprint, b: _Fingerprint) -> float:
+    """1 pentru același nume normalizat, altfel min(Jaccard distinctiv, Jaccard pe tot numele)."""
+    if a.name and a.name == b.name:
+        return 1.0
+    if a.grams and b.grams:
+        return min(_jaccard(a.grams, b.grams), _jaccard(a.all_grams, b.all_grams))
+    return 0.0
+
+
+def similarity(a: _Fingerprint, b: _Fingerprint) -> float:
+    """Scor 0..1: similaritatea numelor, întărită de email / telefon comune."""
+    score = name_similarity(a, b)
+    # fiecare semnal de contact înjumătățește „distanța” rămasă
+    if a.email_key and a.email_key == b.email_key:
+        score = 1 - (1 - score) * 0.5
+    if a.phone_key and a.phone_key == b.phone_key:
+        score = 1 - (1 - score) * 0.5
+    return score
+
+
+class DedupIndex:
+    """Index de blocare pentru furnizorii unei agenții."""
+
+    def __init__(self, records: Iterable[SupplierRecord] = ()) -> None:
+        self._records: Dict[int, SupplierRecord] = {}
+        self._prints: Dict[int, _Fingerprint] = {}
+        self._by_name: Dict[str, Set[int]] = defaultdict(set)
+        self._by_email: Dict[str, Set[int]] = defaultdict(set)
+        self._by_phone: Dict[str, Set[int]] = defaultdict(set)
+        # trigramele tuturor cuvintelor – le include pe cele distinctive,
+        # oricare ar fi cuvintele generice la momentul căutării
+        self._by_gram: Dict[str, Set[int]] = defaultdict(set)
+        self._token_df: Counter = Counter()
+        for rec in records:
+            self.add(rec)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def snapshot(self) -> "DedupIndex":
+        """Copie independentă – clusters() poate rula pe ea fără să blocheze scrierile."""
+        copy = DedupIndex()
+        copy._records = dict(self._records)
+        copy._prints = dict(self._prints)
+        copy._token_df = Counter(self._token_df)
+        for name in ("_by_name", "_by_email", "_by_phone", "_by_gram"):
+            setattr(copy, name, defaultdict(set, {k: set(v) for k, v in getattr(self, name).items()}))
+        return copy
+
+    def generic_tokens(self) -> FrozenSet[str]:
+        """GENERIC_TOKENS plus cuvintele prea frecvente în această agenție."""
+        cutoff = max(GENERIC_MIN_DF, GENERIC_DF_RATIO * len(self))
+        return frozenset(GENERIC_TOKENS.union(t for t, df in self._token_df.items() if df > cutoff))
+
+    def _print(self, supplier_id: int, generic: FrozenSet[str]) -> _Fingerprint:
+        """Amprenta din index, cu trigramele distinctive pentru `generic`."""
+        fp = self._prints[supplier_id]
+        return fp._replace(grams=name_grams(fp.name, generic))
+
+    def _effective(self, fp: _Fingerprint) -> _Fingerprint:
+        """Fără cheile de contact comune la prea mulți furnizori."""
+        if fp.email_key and len(self._by_email.get(fp.email_key, ())) > MAX_CONTACT_BLOCK:
+            fp = fp._replace(email_key=None)
+        if fp.phone_key and len(self._by_phone.get(fp.phone_key, ())) > MAX_CONTACT_BLOCK:
+            fp = fp._replace(phone_key=None)
+        return fp
+
+    def add(self, rec: SupplierRecord) -> None:
+        if rec.id in self._records:
+            self.remove(rec.id)
+        fp = fingerprint(rec)
+        self._records[rec.id] = rec
+        self._prints[rec.id] = fp
+        if fp.name:
+            self._by_name[fp.name].add(rec.id)
+        if fp.email_key:
+            self._by_email[fp.email_key].add(rec.id)
+        if fp.phone_key:
+            self._by_phone[fp.phone_key].add(rec.id)
+        for g in fp.all_grams:
+            self._by_gram[g].add(rec.id)
+        self._token_df.update(set(fp.name.split()))
+
+    def remove(self, supplier_id: int) -> None:
+        fp = self._prints.pop(supplier_id, None)
+        if fp is None:
+            return
+        del self._records[supplier_id]
+        if fp.name:
+            self._discard(self._by_name, fp.name, supplier_id)
+        if fp.email_key:
+            self._discard(self._by_email, fp.email_key, supplier_id)
+        if fp.phone_key:
+            self._discard(self._by_phone, fp.phone_key, supplier_id)
+        for g in fp.all_grams:
+            self._discard(self._by_gram, g, supplier_id)
+        for token in set(fp.name.split()):
+            self._token_df[token] -= 1
+            if not self._token_df[token]:
+                del self._token_df[token]
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[int]], key: str, supplier_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(supplier_id)
+            if not ids:
+                del index[key]
+
+    def _candidates(self, fp: _Fingerprint, threshold: float) -> Set[int]:
+        found: Set[int] = set()
+        if fp.name:
+            found |= self._by_name.get(fp.name, set())
+        if fp.email_key:
+            found |= self._by_email.get(fp.email_key, set())
+        if fp.phone_key:
+            found |= self._by_phone.get(fp.phone_key, set())
+
+        # fără email/telefon comun, perechea trece pragul doar cu Jaccard >= threshold
+        # pe trigramele distinctive (incluse în _by_gram)
+        grams = sorted(fp.grams, key=lambda g: (len(self._by_gram.get(g, ())), g))
+        prefix = len(grams) - math.ceil(threshold * len(grams)) + 1
+        for g in grams[:prefix]:
+            found |= self._by_gram.get(g, set())
+        return found
+
+    def find_duplicates(
+        self,
+        rec: SupplierRecord,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 10,
+    ) -> List[Tuple[SupplierRecord, float]]:
+        """Furnizorii din index care par a fi același cu `rec`, descrescător după scor."""
+        generic = self.generic_tokens()
+        fp = self._effective(fingerprint(rec, generic))
+        hits = []
+        for sid in self._candidates(fp, threshold):
+            if sid == rec.id:
+                continue
+            score = similarity(fp, self._effective(self._print(sid, generic)))
+            if score >= threshold:
+                hits.append((self._records[sid], round(score, 3)))
+        hits.sort(key=lambda h: (-h[1], h[0].id))
+        return hits[:limit]
+
+    def similar_pairs(
+        self, threshold: float = DEFAULT_THRESHOLD,
+    ) -> Tuple[Dict[int, int], Dict[Tuple[int, int], float]]:
+        """
+        Furnizorii cu același nume normalizat formează o unitate (id-ul celui
+        mai mic). Întoarce unitatea fiecărui furnizor și {(u, v): scor} pentru
+        perechile de unități u < v în care cel puțin doi furnizori au scor
+        >= threshold (scorul = maximul acestora).
+        """
+        generic = self.generic_tokens()
+        prints = {sid: self._effective(self._print(sid, generic)) for sid in self._records}
+        unit_of = {sid: sid for sid in self._records}  # numele gol nu se potrivește exact
+        for ids in self._by_name.values():
+            unit = min(ids)
+            for sid in ids:
+                unit_of[sid] = unit
+        pairs: Dict[Tuple[int, int], float] = {}
+
+        def keep(u: int, v: int, score: float) -> None:
+            key = (u, v) if u < v else (v, u)
+            if score > pairs.get(key, 0.0):
+                pairs[key] = score
+
+        # 1) perechile cu email / telefon comun (blocurile-placeholder sunt ignorate)
+        for block in (self._by_email, self._by_phone):
+            for ids in block.values():
+                if len(ids) > MAX_CONTACT_BLOCK:
+                    continue
+                ids = sorted(ids)
+                for i, a in enumerate(ids):
+                    for b in ids[i + 1:]:
+                        if unit_of[a] != unit_of[b]:
+                            score = similarity(prints[a], prints[b])
+                            if score >= threshold:
+                                keep(unit_of[a], unit_of[b], score)
+
+        # 2) perechile găsite doar după nume, o dată pe unitate: indexăm numai
+        #    prefixul de trigrame rare al fiecărei unități, în ordinea crescătoare
+        #    a numărului de trigrame – Jaccard >= t cere și |b| >= t*|a| (filtru
+        #    de lungime) și o suprapunere de cel puțin t/(1+t)*(|a|+|b|) (filtru
+        #    pozițional)
+        units = {u: prints[u].grams for u in set(unit_of.values()) if prints[u].grams}
+        freq = Counter(g for grams in units.values() for g in grams)
+        sizes = {u: len(grams) for u, grams in units.items()}
+        prefix_index: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for u in sorted(units, key=lambda u: (sizes[u], u)):
+            size = sizes[u]
+            grams = sorted(units[u], key=lambda g: (freq[g], g))
+            min_len = threshold * size
+            prefix = size - math.ceil(threshold * size) + 1
+            seen: Set[int] = set()
+            for i, g in enumerate(grams[:prefix]):
+                bucket = prefix_index[g]
+                # unitățile prea scurte nu mai pot trece pragul de acum încolo
+                start = 0
+                while start < len(bucket) and sizes[bucket[start][0]] < min_len:
+                    start += 1
+                if start:
+                    del bucket[:start]
+                for other, j in bucket:
+                    if other in seen:
+                        continue
+                    seen.add(other)
+                    # prima trigramă comună: restul suprapunerii e limitat de ce urmează
+                    need = math.ceil(threshold / (1 + threshold) * (size + sizes[other]))
+                    if (1 + min(size - i - 1, sizes[other] - j - 1) >= need
+                            and len(units[u] & units[other]) >= need):
+                        score = name_similarity(prints[u], prints[other])
+                        if score >= threshold:
+                            keep(u, other, score)
+                bucket.append((u, i))
+        return unit_of, pairs
+
+    def clusters(self, threshold: float = DEFAULT_THRESHOLD) -> List[List[SupplierRecord]]:
+        """
+        Grupurile de duplicate din tot indexul. Perechile se unesc descrescător
+        după scor, dar două grupuri se unesc doar dacă și reprezentanții lor
+        formează o pereche, și doar până la MAX_CLUSTER furnizori – lanțurile
+        A~B~C~… nu mai adună toată agenția într-un grup.
+        """
+        unit_of, pairs = self.similar_pairs(threshold)
+        size = Counter(unit_of.values())
+        parent = {u: u for u in size}
+        rep = {u: u for u in size}
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for (u, v), _ in sorted(pairs.items(), key=lambda p: (-p[1], p[0])):
+            ru, rv = find(u), find(v)
+            if ru == rv or size[ru] + size[rv] > MAX_CLUSTER:
+                continue
+            if tuple(sorted((rep[ru], rep[rv]))) not in pairs:
+                continue
+            # rămâne reprezentantul grupului mai mare
+            if (size[ru], -rep[ru]) < (size[rv], -rep[rv]):
+                ru, rv = rv, ru
+            parent[rv] = ru
+            size[ru] += size[rv]
+
+        groups: Dict[int, List[SupplierRecord]] = defaultdict(list)
+        for sid in sorted(self._records):
+            groups[find(unit_of[sid])].append(self._records[sid])
+        return [g for g in groups.values() if len(g) > 1]
@@ -0,0 +1,127 @@
+# dedup_bench.py – timpul raportului de duplicate pe date sintetice realiste
+#
+#   python dedup_bench.py --suppliers 50000 --threshold 0.6 0.7
+#
+# Numele imită furnizorii reali: nume de familie, localități, puncte cardinale
+# și mărci inventate, urmate de cuvinte de domeniu („Construct”, „Instalatii”)
+# și forme juridice. Aproximativ 10% din furnizori sunt reintroduceri ale
+# altora (greșeli de tipar, alt sufix, fără diacritice, alt telefon / email).
+import argparse
+import random
+import time
+from collections import Counter
+
+import dedup
+from dedup import DedupIndex, SupplierRecord
+
+SURNAME_ROOTS = [
+    "pop", "ion", "georg", "stan", "dumitr", "constantin", "marin", "radu", "tudor",
+    "mihail", "vasil", "stoic", "dobr", "barbu", "nistor", "florea", "lupu", "ene",
+    "munteanu", "toma", "preda", "moldov", "sandu", "neagu", "cristea", "lazar",
+    "ungur", "rusu", "diaconu", "oprea", "matei", "manole", "ciobanu", "voicu",
+]
+GIVEN_NAMES = [
+    "Ion", "Maria", "Andrei", "Elena", "Mihai", "Ana", "Vasile", "Ioana", "Gheorghe",
+    "Cristina", "Alexandru", "Daniela", "Florin", "Mirela", "Adrian", "Gabriela",
+]
+SURNAME_SUFFIXES = ["escu", "eanu", "ache", "oiu", "a", "ică", "an", "u", "el", "ariu"]
+PLACES = [
+    "Carpati", "Dunarea", "Transilvania", "Moldova", "Banat", "Oltenia", "Dobrogea",
+    "Cluj", "Brasov", "Sibiu", "Arad", "Timis", "Bihor", "Prahova", "Arges", "Mures",
+    "Nord", "Sud", "Est", "Vest", "Centru", "Delta", "Bucegi", "Fagaras", "Ceahlau",
+]
+GENERIC = [
+    "Construct", "Constructii", "Invest", "Instalatii", "Impex", "Trans", "Com",
+    "Prod", "Serv", "Grup", "Consult", "Design", "Tehnic", "Proiect", "Industrial",
+    "Distributie", "Materiale", "Beton", "Metal", "Electric", "Termo", "Hidro",
+    "Agro", "Eco", "Auto", "Logistic", "Security", "Energy", "Solar", "Edil",
+]
+SYLLABLES = ["al", "fa", "be", "ta", "ro", "ma", "ter", "vi", "no", "ra", "sel", "tor",
+             "on", "ix", "dor", "lan", "mir", "zen", "ca", "sto", "pri", "mo", "ve", "tex",
+             "nu", "gal", "ri", "plu", "us", "gra"]
+
+
+def _brand(rnd: random.Random) -> str:
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3))).capitalize()
+
+
+def _surname(rnd: random.Random) -> str:
+    # rădăcini reale sau inventate – câteva mii de nume de familie distincte
+    root = rnd.choice(SURNAME_ROOTS) if rnd.random() < 0.3 else _brand(rnd).lower()
+    return (root + rnd.choice(SURNAME_SUFFIXES)).capitalize()
+
+
+def _name(rnd: random.Random) -> str:
+    kind = rnd.random()
+    if kind < 0.35:
+        head = _surname(rnd)
+        if rnd.random() < 0.4:
+            head += " " + rnd.choice(GIVEN_NAMES)
+    elif kind < 0.55:
+        head = rnd.choice(PLACES)
+    elif kind < 0.65:
+        head = f"{_surname(rnd)} {_surname(rnd)}"
+    elif kind < 0.75:
+        head = "".join(rnd.choice("ABCDEFGHIJKLMNOPRSTUV") for _ in range(rnd.randint(2, 3)))
+    else:
+        head = _brand(rnd)
+    tail = " ".join(rnd.sample(GENERIC, rnd.choice([0, 1, 1, 2, 2, 3])))
+    legal = rnd.choice(["SRL", "S.R.L.", "SA", "S.C. {} SRL", ""])
+    name = f"{head} {tail}".strip()
+    return legal.format(name) if "{}" in legal else f"{name} {legal}".strip()
+
+
+def _variant(rnd: random.Random, name: str) -> str:
+    change = rnd.random()
+    if change < 0.3 and len(name) > 4:
+        pos = rnd.randrange(len(name))
+        return name[:pos] + rnd.choice("aeiourst") + name[pos + 1:]
+    if change < 0.5:
+        return name.upper()
+    if change < 0.7:
+        return name.replace(" SRL", "").replace("S.C. ", "") + " S.R.L."
+    return name.replace("a", "ă", 1)
+
+
+def company_records(n: int, seed: int = 0) -> list[SupplierRecord]:
+    rnd = random.Random(seed)
+    records: list[SupplierRecord] = []
+    for i in range(n):
+        if records and rnd.random() < 0.1:
+            orig = rnd.choice(records)
+            name = _variant(rnd, orig.name)
+            email = orig.office_email if rnd.random() < 0.5 else None
+            phone = orig.office_phone if rnd.random() < 0.5 else None
+        else:
+            name = _name(rnd)
+            domain = dedup.normalize_name(name).replace(" ", "") + rnd.choice([".ro", ".com"])
+            email = f"office@{domain}" if rnd.random() < 0.6 else None
+            phone = f"07{rnd.randint(0, 99_999_999):08d}" if rnd.random() < 0.7 else None
+        records.append(SupplierRecord(i, name, email, phone))
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Timpul raportului de duplicate")
+    parser.add_argument("--suppliers", type=int, default=50_000)
+    parser.add_argument("--threshold", type=float, nargs="+", default=[dedup.MIN_THRESHOLD, 0.7])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    records = company_records(args.suppliers, args.seed)
+    start = time.perf_counter()
+    idx = DedupIndex(records)
+    print(f"index: {len(idx)} suppliers in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'threshold':>10} {'seconds':>8} {'clusters':>9} {'clustered':>10} {'largest':>8}")
+    for threshold in args.threshold:
+        start = time.perf_counter()
+        clusters = idx.clusters(threshold)
+        elapsed = time.perf_counter() - start
+        sizes = Counter(len(c) for c in clusters)
+        print(f"{threshold:>10} {elapsed:>8.1f} {len(clusters):>9} "
+              f"{sum(k * v for k, v in sizes.items()):>10} {max(sizes, default=0):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# email_sends.py – cheile Idempotency-Key ale trimiterilor de email
+#
+# Tabela email_sends e comună tuturor workerilor: INSERT-ul pe cheia primară
+# decide care worker trimite emailul; ceilalți primesc răspunsul salvat sau
+# află că trimiterea e încă în curs.
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import Column, DateTime, String, Text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+import shared_state
+
+Base = declarative_base()
+
+# cheile mai vechi se șterg
+SEND_TTL = timedelta(days=1)
+# o cheie rămasă „pending” mai mult de atât (worker oprit în timpul trimiterii) poate fi reluată
+PENDING_TIMEOUT = timedelta(minutes=10)
+
+
+class EmailSend(Base):
+    __tablename__ = "email_sends"
+    key        = Column(String(100), primary_key=True)
+    status     = Column(String(20), nullable=False, default="pending")
+    response   = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SendInProgress(Exception):
+    """Altă cerere cu aceeași cheie trimite emailul chiar acum."""
+
+
+class EmailSendStore:
+    """
+    claim() / finish() / release() pe tabela email_sends. Tabela se creează
+    la prima folosire – Electron pornește uvicorn cu --lifespan off, deci
+    fără hook-urile de startup.
+    """
+
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        self._table_ready = False
+        self._table_lock = threading.Lock()
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        with self._table_lock:
+            if not self._table_ready:
+                shared_state.create_tables(self._engine, Base.metadata)
+                self._table_ready = True
+
+    def claim(self, key: str) -> Optional[Any]:
+        """
+        None dacă apelantul a preluat cheia (și trebuie să trimită emailul);
+        altfel răspunsul salvat al trimiterii anterioare. SendInProgress dacă
+        trimiterea anterioară nu s-a terminat încă.
+        """
+        self._ensure_table()
+        now = datetime.utcnow()
+        with self._session() as db:
+            db.query(EmailSend).filter(EmailSend.created_at < now - SEND_TTL).delete()
+            db.commit()
+
+            db.add(EmailSend(key=key, status="pending", created_at=now))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()
+
+            taken = (
+                db.query(EmailSend)
+                  .filter(EmailSend.key == key, EmailSend.status == "pending",
+                          EmailSend.created_at < now - PENDING_TIMEOUT)
+                  .update({"created_at": now})
+            )
+            db.commit()
+            if taken:
+                return None
+
+            previous = db.get(EmailSend, key)
+            if previous is None:
+                # ștearsă între timp (release) – reîncearcă preluarea
+                return self.claim(key)
+            if previous.status == "done":
+                return json.loads(previous.response)
+            raise SendInProgress(key)
+
+    def finish(self, key: str, response: Any) -> None:
+        """`response` trebuie să fie serializabil JSON."""
+        self._ensure_table()
+        with self._session() as db:
+            db.query(EmailSend).filter_by(key=key).update(
+                {"status": "done", "response": json.dumps(response)}
+            )
+            db.commit()
+
+    def release(self, key: str) -> None:
+        """Trimiterea n-a avut loc – cheia poate fi folosită din nou."""
+        self._ensure_table()
+        with self._session() as db:
+            db.query(EmailSend).filter_by(key=key, status="pending").delete()
+            db.commit()
@@ -0,0 +1,100 @@
+# loadtest.py – debitul API-ului în funcție de numărul de workeri uvicorn
+#
+#   python loadtest.py --workers 1 2 4 --path /agencies/1/suppliers
+#
+# Pentru fiecare valoare pornește `uvicorn main:app --workers N` (aceeași bază
+# de date din .env), trimite cereri GET concurente timp de --duration secunde
+# și afișează cereri/secundă, latența p95 și numărul de erori. Clienții rulează
+# în procese separate, ca GIL-ul clientului să nu limiteze măsurătoarea.
+#
+# Măsurat pe PostgreSQL 16 local (200 de furnizori, --concurrency 8, 10s),
+# pe o mașină cu UN singur CPU:
+#
+#   path                   workers   req/s   p95 ms   scaling
+#   /agencies/1/suppliers     1        4.0   2296.7    1.00x
+#                             2        4.0   2459.6    1.00x
+#                             4        3.6   2994.9    0.90x
+#   /agencies                 1      540.1     20.5    1.00x
+#                             2      482.4     25.9    0.89x
+#                             4      392.2     33.2    0.73x
+#
+# Cu un singur nucleu, workerii în plus doar își împart același CPU, deci
+# tabelul NU arată scalarea – arată doar că nu apar erori. Scalarea trebuie
+# încă măsurată pe o mașină cu mai multe nuclee, cu aceeași comandă.
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+
+def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"Server not ready: {url}")
+
+
+def hammer(url: str, duration: float) -> tuple[list[float], int]:
+    latencies, failures = [], 0
+    end = time.time() + duration
+    while time.time() < end:
+        start = time.perf_counter()
+        try:
+            urllib.request.urlopen(url, timeout=30).read()
+        except OSError:  # HTTPError, timeout, conexiune refuzată
+            failures += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, failures
+
+
+def run(workers: int, args) -> tuple[float, float, int]:
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    try:
+        url = f"http://127.0.0.1:{args.port}{args.path}"
+        wait_ready(url)
+        hammer(url, 1)  # încălzire: pool-uri, cache-uri, indexuri
+        with ProcessPoolExecutor(args.concurrency) as pool:
+            results = list(pool.map(hammer, [url] * args.concurrency, [args.duration] * args.concurrency))
+        latencies = sorted(l for chunk, _ in results for l in chunk)
+        failures = sum(f for _, f in results)
+        rps = len(latencies) / args.duration
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+        return rps, p95, failures
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Debit API vs. număr de workeri")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/agencies")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'p95 ms':>10} {'errors':>8} {'scaling':>8}")
+    baseline = None
+    for n in args.workers:
+        rps, p95, failures = run(n, args)
+        baseline = baseline or rps
+        print(f"{n:>8} {rps:>10.1f} {p95:>10.1f} {failures:>8} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # main.py  – rulează cu:  python -m uvicorn main:app --reload
+#   mai mulți workeri:    WEB_CONCURRENCY=4 python -m uvicorn main:app --host 0.0.0.0
 from typing import List, Optional, Dict, Any
 from enum import Enum as PyEnum
 from sqlalchemy import Enum as SAEnum
@@ -11,6 +12,9 @@ from pydantic_settings import BaseSettings
 from sqlalchemy import Column, Integer, String, ForeignKey, create_engine, UniqueConstraint, Table
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship, Session
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
 
 # Import user configuration module
 import user_config
@@ -20,11 +24,19 @@ from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 import os
+import sys
 import textwrap
 import logging
 import mail
+import dedup
+import shared_state
+import email_sends
+from change_feed import ChangeFeed
 import json
+import hashlib
 import tempfile
+import asyncio
+import threading
 
 # Import mail module
 from mail import send_email, test_email_connection, OfferRequestIn, EmailResponse, UserData, generate_html_email, send_multiple_emails, OfferItem, SupplierContact
@@ -36,15 +48,58 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     vite_api_url: Optional[str] = None  # Adăugat pentru a rezolva eroarea
 
+    # numărul de workeri uvicorn (uvicorn citește aceeași variabilă pentru --workers)
+    WEB_CONCURRENCY: int = 1
+    # conexiuni per worker; dacă lipsește, împărțim DB_MAX_CONNECTIONS la workeri
+    # (scăzând overflow-ul și conexiunile dedicate ale change feed-ului)
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_CONNECTIONS: Optional[int] = None
+    DB_MAX_OVERFLOW: int = 0
+
     class Config:
         env_file = ".env"
 
+    @property
+    def multi_worker(self) -> bool:
+        return self.WEB_CONCURRENCY > 1
+
+    @property
+    def extra_connections(self) -> int:
+        """Conexiuni per worker în afara pool-ului: NOTIFY + LISTEN (doar multi-worker)."""
+        return 2 if self.multi_worker else 0
+
+    @property
+    def pool_size(self) -> int:
+        if self.DB_POOL_SIZE:
+            return self.DB_POOL_SIZE
+        if self.DB_MAX_CONNECTIONS:
+            per_worker = self.DB_MAX_CONNECTIONS // self.WEB_CONCURRENCY
+            return max(1, per_worker - self.DB_MAX_OVERFLOW - self.extra_connections)
+        return 2
+
 settings = Settings()
 
+def _warn_unconfirmed_workers() -> None:
+    """
+    Change feed-ul și indexurile de dedup se sincronizează între workeri doar
+    când WEB_CONCURRENCY > 1. Sub gunicorn (mereu cu workeri) fără variabila
+    setată, avertizăm. Workerii uvicorn nu se pot deosebi din proces de
+    procesul pornit de --reload, deci acolo nu verificăm nimic.
+    """
+    if settings.multi_worker:
+        return
+    if "gunicorn" in sys.modules:
+        print("WARNING: running under gunicorn but WEB_CONCURRENCY is not set. "
+              "With more than one worker set WEB_CONCURRENCY to the worker count, otherwise "
+              "SSE change events and dedup indexes are not shared between workers.")
+
+_warn_unconfirmed_workers()
+
 # --------------------------------------------------------------------
 # 2) SQLAlchemy set‑up
 # --------------------------------------------------------------------
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, pool_size=2, max_overflow=0)
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True,
+                       pool_size=settings.pool_size, max_overflow=settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
@@ -187,6 +242,21 @@ class SupplierOut(SupplierIn):
     offerings: List[OfferingOut]
     model_config = {"from_attributes": True}
 
+# Dedup models
+class DuplicateCheckIn(BaseModel):
+    name: str
+    office_email: Optional[str] = None
+    office_phone: Optional[str] = None
+
+class SupplierBriefOut(DuplicateCheckIn):
+    id: int
+
+class DuplicateOut(SupplierBriefOut):
+    score: float
+
+class DuplicateClusterOut(BaseModel):
+    suppliers: List[SupplierBriefOut]
+
 # User configuration models
 class UserConfigIn(BaseModel):
     nume: str
@@ -216,7 +286,166 @@ class OfferItem(BaseModel):
     unit: Optional[str] = None
 
 # --------------------------------------------------------------------
-# 5) FastAPI
+# 5) Change feed (evenimente push către clienți, prin SSE)
+# --------------------------------------------------------------------
+def _change_feed_url() -> Optional[str]:
+    if not settings.multi_worker:
+        return None
+    if not settings.DATABASE_URL.startswith("postgresql"):
+        print("WARNING: multi-worker change feed needs PostgreSQL (NOTIFY/LISTEN); "
+              "SSE events stay local to each worker.")
+        return None
+    return settings.DATABASE_URL
+
+change_feed = ChangeFeed(_change_feed_url())
+
+def _format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def _event_stream(request: Request, agency_id: Optional[int]):
+    change_feed.bind(asyncio.get_running_loop())
+    q = change_feed.subscribe(agency_id)
+    try:
+        # clientul reîncearcă după 3s dacă se pierde conexiunea
+        yield "retry: 3000\n\n"
+        if request.headers.get("last-event-id"):
+            # reconectare – evenimentele din pauză nu se mai pot relua, deci reîncarcă tot
+            yield _format_sse({"id": change_feed.next_id(), "type": "resync", "agency_id": agency_id})
+        while True:
+            try:
+                event = await asyncio.wait_for(q.get(), timeout=15)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_sse(event)
+    finally:
+        change_feed.unsubscribe(agency_id, q)
+
+# --------------------------------------------------------------------
+# 6) Dedup furnizori (index de blocare per agenție, ținut în memorie)
+# --------------------------------------------------------------------
+_dedup_indexes: Dict[int, dedup.DedupIndex] = {}
+# un lock per agenție – raportul sau construirea indexului unei agenții nu blochează scrierile celorlalte
+_dedup_locks: Dict[int, threading.Lock] = {}
+_dedup_locks_guard = threading.Lock()
+
+def _dedup_lock(agency_id: int) -> threading.Lock:
+    with _dedup_locks_guard:
+        return _dedup_locks.setdefault(agency_id, threading.Lock())
+
+def _dedup_record(s) -> dedup.SupplierRecord:
+    return dedup.SupplierRecord(s.id, s.name, s.office_email, s.office_phone)
+
+def get_dedup_index(db: Session, agency_id: int) -> dedup.DedupIndex:
+    """Indexul agenției; se construiește la prima cerere – apelantul ține _dedup_lock(agency_id)."""
+    idx = _dedup_indexes.get(agency_id)
+    if idx is None:
+        rows = (
+            db.query(Supplier.id, Supplier.name, Supplier.office_email, Supplier.office_phone)
+              .filter(Supplier.agency_id == agency_id)
+              .all()
+        )
+        idx = _dedup_indexes[agency_id] = dedup.DedupIndex(_dedup_record(r) for r in rows)
+    return idx
+
+def dedup_sync(agency_id: int, supplier: Optional[Supplier] = None,
+               removed_id: Optional[int] = None) -> None:
+    """Ține indexul (dacă a fost deja construit) la zi după un commit."""
+    with _dedup_lock(agency_id):
+        idx = _dedup_indexes.get(agency_id)
+        if idx is None:
+            return
+        if removed_id is not None:
+            idx.remove(removed_id)
+        if supplier is not None:
+            idx.add(_dedup_record(supplier))
+
+def _dedup_on_remote(event: dict) -> None:
+    """Furnizorii modificați de alt worker – reîncărcăm doar rândul respectiv."""
+    if event["type"] == "resync":
+        for agency_id in list(_dedup_indexes):
+            with _dedup_lock(agency_id):
+                _dedup_indexes.pop(agency_id, None)
+        return
+    agency_id = event["agency_id"]
+    if not event["type"].startswith("supplier.") or agency_id not in _dedup_indexes:
+        return
+    if event["type"] == "supplier.deleted":
+        dedup_sync(agency_id, removed_id=event["supplier_id"])
+        return
+    with SessionLocal() as db:
+        supplier = db.get(Supplier, event["supplier_id"])
+        if supplier is not None:
+            dedup_sync(agency_id, supplier)
+
+change_feed.on_remote(_dedup_on_remote)
+
+def find_supplier_duplicates(db: Session, agency_id: int, rec: dedup.SupplierRecord,
+                             threshold: float = dedup.DEFAULT_THRESHOLD) -> list[dict]:
+    with _dedup_lock(agency_id):
+        hits = get_dedup_index(db, agency_id).find_duplicates(rec, threshold)
+    return [{**r._asdict(), "score": score} for r, score in hits]
+
+def supplier_clusters(db: Session, agency_id: int,
+                      threshold: float = dedup.DEFAULT_THRESHOLD) -> list[list[dedup.SupplierRecord]]:
+    # sub lock doar copiem indexul; raportul rulează pe copie
+    with _dedup_lock(agency_id):
+        snapshot = get_dedup_index(db, agency_id).snapshot()
+    return snapshot.clusters(threshold)
+
+# --------------------------------------------------------------------
+# 7) Stare partajată între workeri (user_config.json, trimiteri email)
+# --------------------------------------------------------------------
+USER_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_config.json")
+
+# user_config.json se recitește doar când îl modifică cineva (orice worker).
+# Doar endpoint-urile /user-config trec prin cache: mail.py citește fișierul
+# singur, la fiecare trimitere – corect între workeri, dar necache-uit.
+user_config_cache = shared_state.FileBackedCache(USER_CONFIG_FILE, user_config.get_complete_user_data)
+
+# un singur rând pe cheie în toată baza – vizibil tuturor workerilor
+email_send_store = email_sends.EmailSendStore(engine)
+
+def _scoped_send_key(request: Request, key: str) -> str:
+    """Aceeași cheie trimisă la alt endpoint e altă trimitere (și încape în coloană)."""
+    return hashlib.sha256(f"{request.url.path}\n{key}".encode()).hexdigest()
+
+async def idempotent_send(request: Request, send):
+    """
+    Cu header-ul Idempotency-Key, o cerere reluată (dublu-click, retry al
+    load balancer-ului pe alt worker) primește răspunsul primei trimiteri;
+    cât timp prima trimitere e în curs, răspunsul e 409.
+    """
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return await send(request)
+    key = _scoped_send_key(request, key)
+    try:
+        previous = await run_in_threadpool(email_send_store.claim, key)
+    except email_sends.SendInProgress:
+        raise HTTPException(409, "Email send already in progress")
+    if previous is not None:
+        return previous
+    response = None
+    try:
+        response = await send(request)
+    finally:
+        if response is None:
+            # shield: dacă cererea a fost anulată (client deconectat), eliberarea
+            # cheii rulează oricum până la capăt
+            await asyncio.shield(run_in_threadpool(email_send_store.release, key))
+    try:
+        await asyncio.shield(run_in_threadpool(email_send_store.finish, key, jsonable_encoder(response)))
+    except Exception as e:
+        # emailul a plecat deja – clientul primește răspunsul; cheia rămâne
+        # „pending” și blochează reluările până la email_sends.PENDING_TIMEOUT
+        print(f"Could not record email send {key}: {e}")
+    return response
+
+# --------------------------------------------------------------------
+# 8) FastAPI
 # --------------------------------------------------------------------
 app = FastAPI(title="Furnizori API – single file")
 
@@ -231,7 +460,25 @@ app.add_middleware(
 
 @app.on_event("startup")
 def create_tables() -> None:
-    Base.metadata.create_all(bind=engine)
+    # workerii pornesc simultan – create_tables serializează CREATE TABLE
+    shared_state.create_tables(engine, Base.metadata)
+
+@app.on_event("startup")
+async def bind_change_feed() -> None:
+    change_feed.bind(asyncio.get_running_loop())
+
+# ---------------- Change feed (SSE) -----------------------------
+@app.get("/events")
+async def events(request: Request):
+    """Stream SSE cu evenimentele globale (agenții, categorii)."""
+    return StreamingResponse(_event_stream(request, None), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/agencies/{agency_id}/events")
+async def agency_events(agency_id: int, request: Request):
+    """Stream SSE cu modificările furnizorilor din agenție + evenimentele globale."""
+    return StreamingResponse(_event_stream(request, agency_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # ---------------- Agenții (card‑uri UI) -----------------------------
 @app.get("/agencies", response_model=list[AgencyOut])
@@ -247,6 +494,7 @@ def create_agency(a: AgencyIn, db: Session = Depends(get_db)):
     db.add(ag)
     db.commit()
     db.refresh(ag)
+    change_feed.publish("agency.created", created_id=ag.id)
     return ag
 
 # ------------ categorii disponibile într-o agenție -----------------
@@ -280,6 +528,7 @@ def create_category(c: CategoryIn, db: Session = Depends(get_db)):
         raise HTTPException(400, "Category exists")
     cat = Category(name=c.name, type=c.type)
     db.add(cat); db.commit(); db.refresh(cat)
+    change_feed.publish("category.created", category_id=cat.id, category_type=cat.type.value)
     return cat
 
 # ----------- furnizorii dintr-o categorie & agenție -----------------
@@ -313,12 +562,20 @@ def suppliers_by_agency(agency_id: int, db: Session = Depends(get_db)):
 def add_supplier_for_agency(
     agency_id: int,
     s: SupplierIn,
+    check_duplicates: bool = Query(False, description="Refuză (409) furnizorii care par duplicați"),
     db: Session = Depends(get_db)
 ):
     # verificăm dacă agenția există
     if not db.query(Agency).filter_by(id=agency_id).first():
         raise HTTPException(404, "Agency not found")
 
+    if check_duplicates:
+        dups = find_supplier_duplicates(
+            db, agency_id, dedup.SupplierRecord(-1, s.name, s.office_email, s.office_phone)
+        )
+        if dups:
+            raise HTTPException(409, {"message": "Possible duplicate supplier", "duplicates": dups})
+
     # verificăm dacă toate categoriile există
     cat_ids = s.category_ids
     cats = db.query(Category).filter(Category.id.in_(cat_ids)).all()
@@ -347,6 +604,9 @@ def add_supplier_for_agency(
     db.add(supplier)
     db.commit()
     db.refresh(supplier)
+    dedup_sync(agency_id, supplier)
+    change_feed.publish("supplier.created", agency_id, supplier_id=supplier.id,
+                        category_ids=supplier.category_ids)
     return supplier
 
 @app.put("/suppliers/{supplier_id}", response_model=SupplierOut)
@@ -366,6 +626,9 @@ def update_supplier(
     if len(cats) != len(cat_ids):
         raise HTTPException(400, "One or more categories not found")
 
+    # păstrăm categoriile vechi – clienții trebuie să reîncarce și listele din care a ieșit
+    old_cat_ids = supplier.category_ids
+
     # actualizăm furnizorul
     supplier.name = s.name
     supplier.office_email = s.office_email
@@ -388,6 +651,9 @@ def update_supplier(
     
     db.commit()
     db.refresh(supplier)
+    dedup_sync(supplier.agency_id, supplier)
+    change_feed.publish("supplier.updated", supplier.agency_id, supplier_id=supplier.id,
+                        category_ids=sorted(set(old_cat_ids) | set(supplier.category_ids)))
     return supplier
 
 @app.delete("/suppliers/{supplier_id}", status_code=204)
@@ -397,11 +663,44 @@ def delete_supplier(supplier_id: int, db: Session = Depends(get_db)):
     if not supplier:
         raise HTTPException(404, "Supplier not found")
 
+    agency_id, cat_ids = supplier.agency_id, supplier.category_ids
+
     # ștergem furnizorul
     db.delete(supplier)
     db.commit()
+    dedup_sync(agency_id, removed_id=supplier_id)
+    change_feed.publish("supplier.deleted", agency_id, supplier_id=supplier_id,
+                        category_ids=cat_ids)
     return None
 
+# ---------------- Duplicate furnizori -----------------------------
+@app.post("/agencies/{agency_id}/suppliers/duplicates", response_model=list[DuplicateOut])
+def check_supplier_duplicates(
+    agency_id: int,
+    s: DuplicateCheckIn,
+    threshold: float = Query(dedup.DEFAULT_THRESHOLD, ge=dedup.MIN_THRESHOLD, le=1),
+    db: Session = Depends(get_db)
+):
+    """Furnizorii din agenție care par a fi același cu cel trimis (înainte de salvare)"""
+    # altfel am construi (și păstra) un index și un lock pentru orice id
+    if not db.query(Agency).filter_by(id=agency_id).first():
+        raise HTTPException(404, "Agency not found")
+    rec = dedup.SupplierRecord(-1, s.name, s.office_email, s.office_phone)
+    return find_supplier_duplicates(db, agency_id, rec, threshold)
+
+@app.get("/agencies/{agency_id}/suppliers/duplicates", response_model=list[DuplicateClusterOut])
+def supplier_duplicate_clusters(
+    agency_id: int,
+    threshold: float = Query(dedup.DEFAULT_THRESHOLD, ge=dedup.MIN_THRESHOLD, le=1),
+    db: Session = Depends(get_db)
+):
+    """Raport cu grupurile de furnizori duplicați din toată agenția"""
+    # altfel am construi (și păstra) un index și un lock pentru orice id
+    if not db.query(Agency).filter_by(id=agency_id).first():
+        raise HTTPException(404, "Agency not found")
+    clusters = supplier_clusters(db, agency_id, threshold)
+    return [{"suppliers": [r._asdict() for r in group]} for group in clusters]
+
 @app.get("/suppliers/{supplier_id}/offerings", response_model=list[OfferingOut])
 def list_offerings(supplier_id: int, db: Session = Depends(get_db)):
     return db.query(Offering).filter_by(supplier_id=supplier_id).all()
@@ -429,17 +728,20 @@ def search_suppliers_by_offering(
 @app.get("/user-config", response_model=UserConfigOut)
 def get_user_config():
     """Get user configuration data"""
-    return user_config.get_complete_user_data()
+    return user_config_cache.get()
 
 @app.post("/user-config", response_model=UserConfigOut)
 def update_user_config(config_data: UserConfigIn):
     """Update user configuration data"""
-    user_config.save_user_config(config_data.model_dump())
-    return user_config.get_complete_user_data()
+    user_config_cache.write(lambda: user_config.save_user_config(config_data.model_dump()))
+    return user_config_cache.get()
 
 # ---------------- Email Endpoints -----------------------------
 @app.post("/send-offer-request", response_model=EmailResponse)
-async def send_offer_request(
+async def send_offer_request(request: Request):
+    return await idempotent_send(request, _send_offer_request)
+
+async def _send_offer_request(
     request: Request,
 ):
     """
@@ -566,7 +868,10 @@ async def send_offer_request(
         return {"success": False, "message": f"Error: {str(e)}"}
 
 @app.post("/send-multiple-offer-requests", response_model=Dict[str, Any])
-async def send_multiple_offer_requests(
+async def send_multiple_offer_requests(request: Request):
+    return await idempotent_send(request, _send_multiple_offer_requests)
+
+async def _send_multiple_offer_requests(
     request: Request,
 ):
     """
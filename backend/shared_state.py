@@ -0,0 +1,131 @@
+# shared_state.py – stare partajată între workerii uvicorn (fișiere de pe disc)
+#
+# Fiecare worker e un proces separat: cache-ul din memorie e valid cât timp
+# fișierul nu s-a schimbat, iar scrierile / citirile la cache-miss se fac sub
+# un lock exclusiv pe fișierul „<nume>.lock”. Pe lângă stat() (mtime, mărime,
+# inode, ctime) fiecare scriere incrementează un contor ținut în fișierul de
+# lock – două scrieri în același tick al ceasului, cu aceeași mărime, nu se
+# confundă.
+# Schema bazei de date se creează sub un advisory lock Postgres.
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import text
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(fd: int) -> None:
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+# contorul stă după octetul 0 – pe Windows msvcrt.locking blochează chiar
+# octetul 0, iar citirea lui de către alt proces ar eșua
+_VERSION_OFFSET = 8
+
+
+@contextmanager
+def file_lock(path: str):
+    """Lock exclusiv între procese (și între thread-urile aceluiași proces); dă fd-ul fișierului de lock."""
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _lock(fd)
+        try:
+            yield fd
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+# cheie arbitrară pentru pg_advisory_xact_lock
+SCHEMA_LOCK_KEY = 720_531
+
+
+def create_tables(engine, metadata, tables=None) -> None:
+    """metadata.create_all, serializat între workeri (CREATE TABLE concurent eșuează pe Postgres)."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        metadata.create_all(bind=conn, tables=tables)
+
+
+def _read_version(fd: int) -> int:
+    os.lseek(fd, _VERSION_OFFSET, os.SEEK_SET)
+    try:
+        return int(os.read(fd, 20) or 0)
+    except ValueError:
+        return 0
+
+
+def _bump_version(fd: int) -> None:
+    """Se apelează doar cu lock-ul ținut."""
+    version = _read_version(fd) + 1
+    os.lseek(fd, _VERSION_OFFSET, os.SEEK_SET)
+    os.write(fd, str(version).encode().ljust(20))
+
+
+def _stamp(path: str) -> Optional[Tuple[int, ...]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    try:
+        fd = os.open(path + ".lock", os.O_RDONLY)
+    except FileNotFoundError:
+        version = 0
+    else:
+        try:
+            version = _read_version(fd)
+        finally:
+            os.close(fd)
+    return st.st_mtime_ns, st.st_size, st.st_ino, st.st_ctime_ns, version
+
+
+class FileBackedCache:
+    """
+    Rezultatul lui `load()` ținut în memorie până când fișierul `path` se
+    modifică – inclusiv când îl modifică alt worker.
+    """
+
+    def __init__(self, path: str, load: Callable[[], Any]) -> None:
+        self.path = path
+        self._load = load
+        self._stamp: Optional[Tuple[int, ...]] = None
+        self._value: Any = None
+        self._mutex = threading.Lock()
+
+    def get(self) -> Any:
+        stamp = _stamp(self.path)
+        with self._mutex:
+            if stamp is not None and stamp == self._stamp:
+                return self._value
+        with file_lock(self.path):
+            stamp = _stamp(self.path)
+            value = self._load()
+        with self._mutex:
+            self._stamp, self._value = stamp, value
+        return value
+
+    def write(self, save: Callable[[], Any]) -> Any:
+        """Rulează `save()` sub lock; următorul get() reîncarcă valoarea."""
+        with file_lock(self.path) as fd:
+            result = save()
+            _bump_version(fd)
+        with self._mutex:
+            self._stamp = None
+        return result
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from change_feed import ChangeFeed
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def bound_feed():
+    feed = ChangeFeed()
+    feed.bind(asyncio.get_running_loop())
+    return feed
+
+
+async def drain(q):
+    # publish() livrează prin call_soon_threadsafe – lăsăm loop-ul să ruleze o dată
+    await asyncio.sleep(0)
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+def test_agency_event_reaches_only_that_agency():
+    async def scenario():
+        feed = await bound_feed()
+        q1, q2, q_global = feed.subscribe(1), feed.subscribe(2), feed.subscribe(None)
+        feed.publish("supplier.created", agency_id=1, supplier_id=7)
+        return await drain(q1), await drain(q2), await drain(q_global)
+
+    got1, got2, got_global = run(scenario())
+    assert [(e["type"], e["supplier_id"]) for e in got1] == [("supplier.created", 7)]
+    assert got2 == [] and got_global == []
+
+
+def test_global_event_reaches_every_subscriber():
+    async def scenario():
+        feed = await bound_feed()
+        queues = [feed.subscribe(1), feed.subscribe(2), feed.subscribe(None)]
+        feed.publish("category.created", category_id=3)
+        return [await drain(q) for q in queues]
+
+    for got in run(scenario()):
+        assert [e["type"] for e in got] == ["category.created"]
+
+
+def test_full_queue_is_replaced_by_resync(monkeypatch):
+    monkeypatch.setattr(ChangeFeed, "QUEUE_SIZE", 2)
+
+    async def scenario():
+        feed = await bound_feed()
+        q = feed.subscribe(1)
+        for i in range(3):
+            feed.publish("supplier.updated", agency_id=1, supplier_id=i)
+        return await drain(q)
+
+    got = run(scenario())
+    assert [(e["type"], e["agency_id"]) for e in got] == [("resync", 1)]
+
+
+def test_unsubscribe_stops_delivery():
+    async def scenario():
+        feed = await bound_feed()
+        q = feed.subscribe(1)
+        feed.unsubscribe(1, q)
+        feed.unsubscribe(1, q)  # a doua oară nu e o eroare
+        feed.publish("supplier.deleted", agency_id=1, supplier_id=1)
+        return feed, await drain(q)
+
+    feed, got = run(scenario())
+    assert got == []
+    assert feed._subscribers == {}
+
+
+def test_publish_before_bind_is_dropped():
+    feed = ChangeFeed()
+    feed.publish("agency.created", created_id=1)  # fără loop – nu aruncă
+
+
+def test_event_ids_are_unique_and_worker_prefixed():
+    feed = ChangeFeed()
+    ids = {feed.next_id() for _ in range(100)}
+    assert len(ids) == 100
+    assert all(i.startswith(f"{feed._origin}-") for i in ids)
+
+
+@pytest.mark.parametrize("origin, called", [("other-worker", True), (None, True), ("self", False)])
+def test_remote_listeners_skip_own_events(origin, called):
+    feed = ChangeFeed()
+    seen = []
+    feed.on_remote(seen.append)
+    event = {"id": "x-1", "origin": feed._origin if origin == "self" else origin,
+             "type": "supplier.updated", "agency_id": 1, "supplier_id": 5}
+    feed._receive(event)
+    assert seen == ([event] if called else [])
@@ -0,0 +1,199 @@
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+import dedup
+from dedup import DedupIndex, SupplierRecord, fingerprint, similarity
+
+
+def random_records(n, seed):
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choice("abcdefghij") for _ in range(rnd.randint(3, 7))) for _ in range(120)]
+    # și câteva cuvinte generice, ca să ajungă și la pragul GENERIC_MIN_DF
+    words += ["construct", "invest", "trans"] * 10
+    domains = [f"d{i}.ro" for i in range(15)] + ["gmail.com"]
+    records = []
+    for i in range(n):
+        name = " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 3)))
+        if rnd.random() < 0.3:
+            # mici greșeli de tipar / forme juridice
+            pos = rnd.randrange(len(name))
+            name = name[:pos] + rnd.choice("abcdefghij") + name[pos + 1:]
+            name = rnd.choice(["S.C. ", ""]) + name + rnd.choice([" SRL", " S.A.", ""])
+        email = f"x{rnd.randint(0, 3)}@{rnd.choice(domains)}" if rnd.random() < 0.5 else None
+        phone = f"07{rnd.randint(0, 20):08d}" if rnd.random() < 0.5 else None
+        records.append(SupplierRecord(i, name, email, phone))
+    return records
+
+
+def effective_prints(records, generic, extra=()):
+    """Amprentele fără cheile de contact comune la peste MAX_CONTACT_BLOCK furnizori."""
+    prints = {r.id: fingerprint(r, generic) for r in records}
+    emails = Counter(fp.email_key for fp in prints.values() if fp.email_key)
+    phones = Counter(fp.phone_key for fp in prints.values() if fp.phone_key)
+
+    def strip(fp):
+        if fp.email_key and emails[fp.email_key] > dedup.MAX_CONTACT_BLOCK:
+            fp = fp._replace(email_key=None)
+        if fp.phone_key and phones[fp.phone_key] > dedup.MAX_CONTACT_BLOCK:
+            fp = fp._replace(phone_key=None)
+        return fp
+
+    return {sid: strip(fp) for sid, fp in prints.items()}, [strip(fingerprint(r, generic)) for r in extra]
+
+
+def brute_pairs(records, threshold):
+    prints, _ = effective_prints(records, DedupIndex(records).generic_tokens())
+    unit_of = {}
+    for sid in sorted(prints):
+        name = prints[sid].name
+        unit_of[sid] = next((u for u in sorted(unit_of) if name and prints[u].name == name), sid)
+    pairs = {}
+    for a, b in itertools.combinations(sorted(prints), 2):
+        if unit_of[a] == unit_of[b]:
+            continue
+        score = similarity(prints[a], prints[b])
+        key = tuple(sorted((unit_of[a], unit_of[b])))
+        if score >= threshold and score > pairs.get(key, 0):
+            pairs[key] = score
+    return unit_of, pairs
+
+
+@pytest.fixture(autouse=True)
+def small_contact_block(monkeypatch):
+    # ca datele aleatoare să atingă și blocurile-placeholder
+    monkeypatch.setattr(dedup, "MAX_CONTACT_BLOCK", 8)
+
+
+@pytest.mark.parametrize("threshold", [0.6, 0.7, 0.9])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_similar_pairs_match_brute_force(seed, threshold):
+    records = random_records(400, seed)
+    unit_of, pairs = DedupIndex(records).similar_pairs(threshold)
+    expected_units, expected = brute_pairs(records, threshold)
+    assert unit_of == expected_units
+    assert pairs == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("threshold", [0.6, 0.7])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_clusters_are_stars_of_similar_pairs(seed, threshold, monkeypatch):
+    monkeypatch.setattr(dedup, "MAX_CLUSTER", 6)
+    records = random_records(400, seed)
+    unit_of, pairs = brute_pairs(records, threshold)
+    clustered = set()
+    for group in DedupIndex(records).clusters(threshold):
+        ids = {r.id for r in group}
+        assert not ids & clustered
+        clustered |= ids
+        units = {unit_of[sid] for sid in ids}
+        if len(units) == 1:
+            continue  # același nume – nu se aplică limita
+        assert len(ids) <= dedup.MAX_CLUSTER
+        # există un reprezentant care formează o pereche cu fiecare membru
+        assert any(all(tuple(sorted((c, u))) in pairs for u in units - {c}) for c in units)
+
+
+@pytest.mark.parametrize("threshold", [0.6, 0.7])
+def test_find_duplicates_match_brute_force(threshold):
+    records = random_records(400, 3)
+    queries = [SupplierRecord(-1, r.name, r.office_email, r.office_phone)
+               for r in random_records(60, 4)]
+    idx = DedupIndex(records)
+    prints, query_prints = effective_prints(records, idx.generic_tokens(), queries)
+    for query, qfp in zip(queries, query_prints):
+        got = {r.id for r, _ in idx.find_duplicates(query, threshold, limit=len(records))}
+        expected = {sid for sid, fp in prints.items() if similarity(qfp, fp) >= threshold}
+        assert got == expected
+
+
+def test_clusters_do_not_chain():
+    # a~b și b~c, dar a nu seamănă cu c: c rămâne în afara grupului
+    a, b, c = (SupplierRecord(1, "popescuxyz"), SupplierRecord(2, "popescuxy"),
+               SupplierRecord(3, "popescux"))
+    idx = DedupIndex([a, b, c])
+    assert similarity(fingerprint(a), fingerprint(c)) < 0.8
+    assert idx.clusters(0.8) == [[a, b]]
+
+
+@pytest.mark.parametrize("names", [
+    ["Nord Construct Invest", "Sud Construct Invest", "Est Construct Invest", "Vest Construct Invest"],
+    ["Vest Instalatii", "Est Instalatii"],
+])
+def test_generic_words_do_not_make_names_similar(names):
+    idx = DedupIndex(SupplierRecord(i, n) for i, n in enumerate(names))
+    assert idx.clusters(dedup.MIN_THRESHOLD) == []
+    assert idx.find_duplicates(SupplierRecord(-1, names[0] + " SRL"), dedup.MIN_THRESHOLD) == [
+        (SupplierRecord(0, names[0]), 1.0)
+    ]
+
+
+@pytest.mark.parametrize("a, b, same", [
+    ("Popescu Construct", "Popescu Constructii", True),
+    ("Popescu Beton", "Popescu Auto", False),
+    ("Est Construct Invest", "Est Instalatii", False),
+    ("Construct Invest", "Constructii Invest", False),  # doar cuvinte generice
+])
+def test_distinctive_and_whole_name_must_both_match(a, b, same):
+    idx = DedupIndex([SupplierRecord(1, a), SupplierRecord(2, b)])
+    assert bool(idx.clusters(dedup.MIN_THRESHOLD)) == same
+
+
+def test_frequent_words_become_generic():
+    records = [SupplierRecord(i, f"Carpati {w}") for i, w in
+               enumerate(["".join(random.Random(i).choices("klmnoprstuv", k=6)) for i in range(30)])]
+    idx = DedupIndex(records)
+    assert "carpati" in idx.generic_tokens()
+    assert idx.clusters(dedup.MIN_THRESHOLD) == []
+
+
+def test_identical_names_stay_together_past_the_cap(monkeypatch):
+    monkeypatch.setattr(dedup, "MAX_CLUSTER", 5)
+    records = [SupplierRecord(i, "Holcim") for i in range(12)]
+    assert [len(g) for g in DedupIndex(records).clusters()] == [12]
+
+
+def test_snapshot_is_independent():
+    idx = DedupIndex([SupplierRecord(1, "Alfa Beton"), SupplierRecord(2, "Alfa Beton SRL")])
+    snap = idx.snapshot()
+    idx.remove(2)
+    assert len(snap.clusters()) == 1
+    assert idx.clusters() == []
+
+
+def test_placeholder_phone_does_not_link_suppliers():
+    rnd = random.Random(5)
+    records = [SupplierRecord(i, "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10)),
+                              None, "0721 555 123") for i in range(30)]
+    assert DedupIndex(records).clusters() == []
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("S.C. Construcții Bună S.R.L.", "constructii buna"),
+    ("HOLCIM (ROMANIA) SA", "holcim"),
+    ("S.C. SA", ""),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_name(raw, expected):
+    assert dedup.normalize_name(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+40 721-123-456", "721123456"),
+    ("0721123456", "721123456"),
+    ("0040 21 231 17 00", "212311700"),
+    ("0000 000 000", None),
+    ("12-34", None),
+    (None, None),
+])
+def test_normalize_phone(raw, expected):
+    assert dedup.normalize_phone(raw) == expected
+
+
+def test_name_only_legal_suffixes_is_not_a_duplicate():
+    idx = DedupIndex([SupplierRecord(1, "S.C. SA"), SupplierRecord(2, "SRL")])
+    assert idx.clusters() == []
+    assert idx.find_duplicates(SupplierRecord(-1, "S.A.")) == []
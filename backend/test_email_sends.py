@@ -0,0 +1,95 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+import email_sends
+from email_sends import EmailSend, EmailSendStore, SendInProgress
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'sends.db'}")
+
+
+@pytest.fixture
+def store(engine):
+    return EmailSendStore(engine)
+
+
+def age(engine, key, delta):
+    """Mută created_at al cheii în trecut."""
+    with engine.begin() as conn:
+        conn.execute(EmailSend.__table__.update()
+                     .where(EmailSend.key == key)
+                     .values(created_at=datetime.utcnow() - delta))
+
+
+def test_table_is_created_on_first_use(engine, store):
+    assert not inspect(engine).has_table("email_sends")
+    assert store.claim("k") is None
+    assert inspect(engine).has_table("email_sends")
+
+
+def test_second_claim_waits_then_gets_saved_response(store):
+    assert store.claim("k") is None
+    with pytest.raises(SendInProgress):
+        store.claim("k")
+    store.finish("k", {"success": True, "message": "sent"})
+    assert store.claim("k") == {"success": True, "message": "sent"}
+
+
+def test_released_key_can_be_claimed_again(store):
+    assert store.claim("k") is None
+    store.release("k")
+    assert store.claim("k") is None
+
+
+def test_release_keeps_finished_sends(store):
+    store.claim("k")
+    store.finish("k", {"success": True})
+    store.release("k")
+    assert store.claim("k") == {"success": True}
+
+
+def test_stale_pending_key_is_taken_over(engine, store):
+    assert store.claim("k") is None
+    age(engine, "k", email_sends.PENDING_TIMEOUT * 2)
+    assert store.claim("k") is None
+    # preluarea reînnoiește cheia – o a treia cerere așteaptă din nou
+    with pytest.raises(SendInProgress):
+        store.claim("k")
+
+
+def test_expired_keys_are_purged(engine, store):
+    store.claim("old")
+    store.finish("old", {"success": True})
+    age(engine, "old", email_sends.SEND_TTL * 2)
+    store.claim("other")
+    with engine.connect() as conn:
+        keys = [row.key for row in conn.execute(EmailSend.__table__.select())]
+    assert keys == ["other"]
+    # după expirare aceeași cheie înseamnă o trimitere nouă
+    assert store.claim("old") is None
+
+
+def test_concurrent_claims_have_a_single_winner(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}", connect_args={"timeout": 30})
+    store = EmailSendStore(engine)
+    store.claim("warmup")
+    results = []
+
+    def claim():
+        try:
+            results.append(store.claim("k"))
+        except SendInProgress:
+            results.append("busy")
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(None) == 1
+    assert results.count("busy") == 7
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+
+import pytest
+
+from shared_state import FileBackedCache, file_lock
+
+
+@pytest.fixture
+def path(tmp_path):
+    p = str(tmp_path / "config.json")
+    with open(p, "w") as f:
+        json.dump({"nume": "Ana"}, f)
+    return p
+
+
+def counting_cache(path):
+    loads = []
+
+    def load():
+        with open(path) as f:
+            loads.append(1)
+            return json.load(f)
+
+    return FileBackedCache(path, load), loads
+
+
+def save(path, value):
+    def _save():
+        with open(path, "w") as f:
+            json.dump(value, f)
+    return _save
+
+
+def test_value_is_cached_until_the_file_changes(path):
+    cache, loads = counting_cache(path)
+    assert cache.get() == {"nume": "Ana"}
+    assert cache.get() == {"nume": "Ana"}
+    assert len(loads) == 1
+    cache.write(save(path, {"nume": "Ion"}))
+    assert cache.get() == {"nume": "Ion"}
+    assert len(loads) == 2
+
+
+def test_write_from_another_worker_invalidates(path):
+    # două instanțe = doi workeri cu același fișier
+    mine, _ = counting_cache(path)
+    other, _ = counting_cache(path)
+    assert mine.get() == {"nume": "Ana"}
+    other.write(save(path, {"nume": "Dan"}))
+    assert mine.get() == {"nume": "Dan"}
+
+
+def test_same_size_same_mtime_write_is_seen(path):
+    mine, _ = counting_cache(path)
+    other, _ = counting_cache(path)
+    assert mine.get() == {"nume": "Ana"}
+    st = os.stat(path)
+
+    def same_stamp():
+        save(path, {"nume": "Eva"})()  # aceeași lungime ca „Ana”
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    other.write(same_stamp)
+    assert os.path.getsize(path) == st.st_size
+    assert mine.get() == {"nume": "Eva"}
+
+
+def test_replaced_file_is_seen(path):
+    # scriere atomică din afara cache-ului: fișier nou + rename
+    cache, _ = counting_cache(path)
+    assert cache.get() == {"nume": "Ana"}
+    st = os.stat(path)
+    tmp = path + ".tmp"
+    save(tmp, {"nume": "Ema"})()
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, path)
+    assert cache.get() == {"nume": "Ema"}
+
+
+def test_missing_file_is_not_cached(tmp_path):
+    path = str(tmp_path / "missing.json")
+    calls = []
+    cache = FileBackedCache(path, lambda: calls.append(1) or {})
+    cache.get()
+    cache.get()
+    assert len(calls) == 2
+
+
+def test_file_lock_is_exclusive_between_threads(path):
+    inside, overlaps = [], []
+
+    def worker():
+        for _ in range(20):
+            with file_lock(path):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                inside.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == []
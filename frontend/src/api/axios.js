@@ -82,10 +82,14 @@ if (isElectron) {
   });
 }
 
+// Eveniment emis pe window când se schimbă URL-ul API (ex. stream-urile SSE se redeschid)
+export const API_URL_CHANGED = 'api-url-changed';
+
 // Funcție pentru a actualiza URL-ul API
 export const updateApiUrl = (newUrl) => {
   api.defaults.baseURL = newUrl;
   console.log('API URL updated to:', newUrl);
+  window.dispatchEvent(new CustomEvent(API_URL_CHANGED, { detail: newUrl }));
 };
 
 // Ascultăm pentru modificări în localStorage (pentru versiunea web)
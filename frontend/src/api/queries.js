@@ -1,5 +1,6 @@
+import { useEffect, useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { api } from './axios';
+import { api, API_URL_CHANGED } from './axios';
 
 // Configurații comune pentru toate query-urile
 const defaultQueryConfig = {
@@ -94,3 +95,62 @@ export const useUpdateUserConfig = () => {
     },
   });
 };
+
+// ▸ /events, /agencies/:id/events – invalidăm doar query-urile afectate de modificările altor utilizatori
+export const useChangeFeed = (agencyId) => {
+  const queryClient = useQueryClient();
+  const [baseURL, setBaseURL] = useState(api.defaults.baseURL);
+
+  // redeschidem stream-ul când se schimbă serverul API
+  useEffect(() => {
+    const onUrlChange = (e) => setBaseURL(e.detail);
+    window.addEventListener(API_URL_CHANGED, onUrlChange);
+    return () => window.removeEventListener(API_URL_CHANGED, onUrlChange);
+  }, []);
+
+  useEffect(() => {
+    const path = agencyId ? `/agencies/${agencyId}/events` : '/events';
+    const source = new EventSource(`${baseURL}${path}`);
+
+    // EventSource se reconectează singur, dar evenimentele din pauză se pierd
+    let disconnected = false;
+    source.onerror = () => { disconnected = true; };
+    source.onopen = () => {
+      if (disconnected) {
+        disconnected = false;
+        queryClient.invalidateQueries();
+      }
+    };
+
+    const onChange = (e) => {
+      const event = JSON.parse(e.data);
+      switch (event.type) {
+        case 'agency.created':
+          queryClient.invalidateQueries({ queryKey: ['agencies'] });
+          break;
+        case 'category.created':
+          queryClient.invalidateQueries({ queryKey: ['categories'] });
+          break;
+        case 'supplier.created':
+        case 'supplier.updated':
+        case 'supplier.deleted':
+          // categoriile listate depind de furnizorii agenției
+          queryClient.invalidateQueries({ queryKey: ['categories', event.agency_id] });
+          event.category_ids.forEach(catId =>
+            queryClient.invalidateQueries({ queryKey: ['suppliers', event.agency_id, catId] })
+          );
+          queryClient.invalidateQueries({ queryKey: ['search', event.agency_id] });
+          break;
+        default:
+          // 'resync' – am pierdut evenimente, reîncărcăm tot
+          queryClient.invalidateQueries();
+      }
+    };
+
+    ['agency.created', 'category.created', 'supplier.created',
+     'supplier.updated', 'supplier.deleted', 'resync']
+      .forEach(type => source.addEventListener(type, onChange));
+
+    return () => source.close();
+  }, [agencyId, baseURL, queryClient]);
+};
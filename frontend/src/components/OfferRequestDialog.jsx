@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import {
   Dialog,
   DialogTitle,
@@ -45,6 +45,18 @@ import { StyledDialogContent, textInputSX } from '../pages/agency_components/sty
 import EmailPreviewDialog from './EmailPreviewDialog';
 import MultiSendDialog from './MultiSendDialog';
 
+// crypto.randomUUID există doar în contexte sigure (HTTPS / localhost)
+const newIdempotencyKey = () => {
+  if (typeof crypto !== 'undefined' && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  if (typeof crypto !== 'undefined' && crypto.getRandomValues) {
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+  }
+  return `${Date.now().toString(16)}-${Math.random().toString(16).slice(2)}`;
+};
+
 const initialItem = { name: '', quantity: '', unit: '' };
 
 // Adaug constante pentru localStorage
@@ -82,6 +94,8 @@ export default function OfferRequestDialog({ open, onClose, type, multiSendMode
   const [transferLink, setTransferLink] = useState('');
   const [isSubcontract, setIsSubcontract] = useState(false);
   const [isSending, setIsSending] = useState(false);
+  // cheia trimiterii curente – păstrată la erori de rețea, ca reîncercarea să nu dubleze emailul
+  const idempotencyKeyRef = useRef(null);
   const [error, setError] = useState(null);
   
   // Category and supplier selection
@@ -284,6 +298,7 @@ export default function OfferRequestDialog({ open, onClose, type, multiSendMode
     setUseMultiSend(false);
     setSelectedSupplierContacts([]);
     setIsSending(false);
+    idempotencyKeyRef.current = null;
     setOpenPreview(false);
     setPreviewData(null);
     setUseTableFormat(false); // Reset table format toggle
@@ -648,6 +663,13 @@ export default function OfferRequestDialog({ open, onClose, type, multiSendMode
       
       // Determină endpoint-ul în funcție de modul de trimitere
       const endpoint = useMultiSend ? '/send-multiple-offer-requests' : '/send-offer-request';
+
+      // Reîncercările după o eroare de rețea / timeout refolosesc cheia – serverul
+      // întoarce rezultatul primei trimiteri în loc să trimită emailul din nou
+      if (!idempotencyKeyRef.current) {
+        idempotencyKeyRef.current = newIdempotencyKey();
+      }
+      const idempotencyKey = idempotencyKeyRef.current;
       
       // Check if we need to handle file uploads (for web version)
       const hasWebFiles = selectedFiles.some(file => file.file && file.file instanceof File);
@@ -702,7 +724,8 @@ export default function OfferRequestDialog({ open, onClose, type, multiSendMode
         console.log('Sending request with FormData...');
         const response = await api.post(endpoint, formData, {
           headers: {
-            'Content-Type': undefined
+            'Content-Type': undefined,
+            'Idempotency-Key': idempotencyKey
           }
         });
         
@@ -712,13 +735,27 @@ export default function OfferRequestDialog({ open, onClose, type, multiSendMode
         // Electron version or no files - send as regular JSON
         console.log('Sending offer request data with documents:', data.documents);
         console.log('Document names:', data.document_names);
-        const response = await api.post(endpoint, data);
+        const response = await api.post(endpoint, data, {
+          headers: { 'Idempotency-Key': idempotencyKey }
+        });
         handleEmailResponse(response);
       }
+      // serverul a răspuns – următoarea trimitere e una nouă
+      idempotencyKeyRef.current = null;
     } catch (error) {
       console.error('Error sending offer request:', error);
       console.error('Error details:', error.response?.data);
-      setError(`Eroare: ${error.response?.data?.detail || error.message}`);
+      const status = error.response?.status;
+      // 409 (trimitere încă în curs), 5xx și erorile de rețea păstrează cheia –
+      // emailul poate să fi plecat deja, iar reîncercarea primește rezultatul lui
+      if (status && status < 500 && status !== 409) {
+        idempotencyKeyRef.current = null;
+      }
+      if (status === 409) {
+        setError('Cererea anterioară este încă în curs de trimitere. Reîncercați în câteva momente.');
+      } else {
+        setError(`Eroare: ${error.response?.data?.detail || error.message}`);
+      }
     } finally {
       setIsSending(false);
     }
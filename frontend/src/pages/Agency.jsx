@@ -18,7 +18,7 @@ import AddIcon from '@mui/icons-material/Add';
 import EmailIcon from '@mui/icons-material/Email';
 import { useQueryClient, useMutation } from '@tanstack/react-query';
 import { api } from '../api/axios';
-import { useCategories } from '../api/queries';
+import { useCategories, useChangeFeed } from '../api/queries';
 import { useNavigate } from 'react-router-dom';
 import { styled } from '@mui/material/styles';
 import { useUser } from '../context/UserContext';
@@ -122,6 +122,7 @@ export default function Agency() {
 
   /* ---------- queries ---------- */
   const { data: cats = [] } = useCategories(agencyId, type);
+  useChangeFeed(agencyId);
 
   /* ---------- mutations ---------- */
   const addCategory = useMutation({
@@ -1,6 +1,6 @@
 // src/pages/Home.jsx
 import { useState, useEffect } from 'react';
-import { useAgencies } from '../api/queries';
+import { useAgencies, useChangeFeed } from '../api/queries';
 import { useNavigate } from 'react-router-dom';
 import {
   Box,
@@ -64,6 +64,7 @@ const isElectron = window.api !== undefined;
 
 export default function Home() {
   const { data: agencies = [] } = useAgencies();
+  useChangeFeed();
   const nav = useNavigate();
   const [clickedId, setClickedId] = useState(null);
   const [dbConfigOpen, setDbConfigOpen] = useState(false);